@@ -11,10 +11,14 @@ Cmd = net_client.Cmd
 
 default_prompt = 'TADA> '
 
+# status bar fields as plain str, so the per-message loop skips enum lookups
+status_keys = tuple(k.value for k in [K.room_name, K.silver, K.hit_points, K.experience,
+                                      K.last_command])
+
 
 class Client(net_client.Client):
     def __init__(self):
-        self.status = {K.room_name: '', K.silver: 0, K.hit_points: 0, K.experience: 0}
+        self.status = {'room_name': '', 'silver': 0, 'hit_points': 0, 'experience': 0}
 
     def process_request(self, request):
         if request['error'] != '':
@@ -22,8 +26,9 @@ class Client(net_client.Client):
             error_line = request['error_line']
             logging.error("process_request: %s (%s)" % (error_line, error_code))
         # update status bar:
-        for f in [K.room_name, K.silver, K.hit_points, K.experience, K.last_command]:
-            v = request.get('changes', {}).get(f)
+        changes = request.get('changes', {})
+        for f in status_keys:
+            v = changes.get(f)
             if v:
                 self.status[f] = v
         # are there any multiple-choice options (like "Quit game? yes/no")
@@ -34,13 +39,13 @@ class Client(net_client.Client):
         if prompt == '':
             # print("---< %(room_name)s | health %(health)d | xp %(xp)d | %(silver)d gold >---" % self.status)
             logging.debug("process_request: prompt: %s" % self.status)
-            s = self.status[K.silver]  # returns set() item (as string)
+            s = self.status['silver']  # returns set() item (as string)
             logging.debug("process_request: silver: %s" % s)
-            print(f"---< {self.status[K.room_name]} | "
-                  f"HP: {self.status[K.hit_points]} | "
-                  f"Experience: {self.status[K.experience]} | "
-                  # TODO: f"Silver in hand: {self.status[K.silver['in_hand']]}"
-                  f"Silver: {self.status[K.silver]}"                  
+            print(f"---< {self.status['room_name']} | "
+                  f"HP: {self.status['hit_points']} | "
+                  f"Experience: {self.status['experience']} | "
+                  # TODO: f"Silver in hand: {self.status['silver']['in_hand']}"
+                  f"Silver: {self.status['silver']}"                  
                   f" >---")
         for m in request['lines']:
             print(m)
@@ -17,7 +17,7 @@ run_dir = 'run/client'
 net_dir = os.path.join(run_dir, 'net')
 
 
-@dataclass
+@dataclass(slots=True)
 class Init(object):
     id: str
     key: str
@@ -49,7 +49,7 @@ class Login(object):
                                                       in o.__dict__.items() if v}, indent=4)
 
 
-@dataclass
+@dataclass(slots=True)
 class Cmd(object):
     text: str
 
@@ -68,12 +68,16 @@ class Client(object):
         init_params = {'id': id, 'key': key, 'protocol': protocol}
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as self.clientSocket:
             try:
+                self.clientSocket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
                 self.clientSocket.connect((self.host, self.port))
                 logging.debug("Client.start: connected (%s:%s)" % (self.host, self.port))
-                self.clientSocket.sendall(nc.toJSONB(Init(**init_params)))
+                self._rx_buf = bytearray(nc.socket_buffer_size)
+                self._rx_view = memoryview(self._rx_buf)
+                self._rx_start = self._rx_end = 0
+                self._send_data(Init(**init_params))
                 self.active = True
                 while self.active:
-                    request = nc.fromJSONB(self.clientSocket.recv(1024))
+                    request = nc.fromJSONB(self._receive_frame())
                     if request is None:
                         logging.debug("Client.start: no request.")
                         self.active = False
@@ -86,7 +90,56 @@ class Client(object):
         logging.info('Exiting.')
 
     def _send_data(self, data):
-        self.clientSocket.sendall(nc.toJSONB(data))
+        buf = nc.toJSONB(data)
+        header = nc.frame_header.pack(len(buf))
+        if not hasattr(self.clientSocket, 'sendmsg'):  # Windows
+            self.clientSocket.sendall(header + buf)
+            return
+        # header and payload go out in one syscall without joining them
+        buffers = [memoryview(header), memoryview(buf)]
+        while buffers:
+            sent = self.clientSocket.sendmsg(buffers)
+            # drop what was sent, may be a partial write
+            while buffers and sent >= len(buffers[0]):
+                sent -= len(buffers[0])
+                buffers.pop(0)
+            if buffers:
+                buffers[0] = buffers[0][sent:]
+
+    def _receive_frame(self):
+        """return next length-prefixed payload, or b'' if server closed.
+        Data is received straight into one reusable buffer; the payload is
+        a memoryview into it, only valid until the next call.
+        """
+        header_size = nc.frame_header.size
+        while True:
+            available = self._rx_end - self._rx_start
+            if available >= header_size:
+                size, = nc.frame_header.unpack_from(self._rx_buf, self._rx_start)
+                needed = header_size + size
+                if available >= needed:
+                    start = self._rx_start + header_size
+                    payload = self._rx_view[start:start + size]
+                    self._rx_start += needed
+                    if self._rx_start == self._rx_end:
+                        # everything consumed, receive from the start again
+                        self._rx_start = self._rx_end = 0
+                    return payload
+                if needed > len(self._rx_buf):
+                    # frame bigger than buffer: move it to a larger one
+                    buf = bytearray(needed)
+                    buf[:available] = self._rx_view[self._rx_start:self._rx_end]
+                    self._rx_buf = buf
+                    self._rx_view = memoryview(buf)
+                    self._rx_start, self._rx_end = 0, available
+            if self._rx_end == len(self._rx_buf):
+                # out of room at the end: move partial frame to the front
+                self._rx_buf[:available] = self._rx_buf[self._rx_start:self._rx_end]
+                self._rx_start, self._rx_end = 0, available
+            n = self.clientSocket.recv_into(self._rx_view[self._rx_end:])
+            if n == 0:
+                return b''
+            self._rx_end += n
 
     def _print_common(self, request):
         if request['error'] != '':
@@ -1,9 +1,12 @@
 import os
+import re
 import json
 import enum
 from dataclasses import dataclass, field
 import datetime
+import struct
 import bcrypt
+import orjson
 
 import util
 
@@ -11,6 +14,15 @@ run_server_dir = 'run/server'
 invite_dir = os.path.join(run_server_dir, 'invite')
 net_dir = os.path.join(run_server_dir, 'net')
 
+# every message on the wire is a 4-byte big-endian payload length followed
+# by the JSON payload, so messages aren't cut at TCP segment boundaries
+frame_header = struct.Struct('>I')
+max_frame_size = 1024 * 1024
+socket_buffer_size = 65536
+
+# command tokens: "quoted words" as one token, otherwise split on whitespace
+token_re = re.compile(r'"([^"]*)"|(\S+)')
+
 
 class K(str, enum.Enum):
     """keys for dictionary use, so that we can avoid 'stringly' typed
@@ -34,22 +46,35 @@ class Mode(str, enum.Enum):
     bye = 'bye'
 
 
+def _object_dict(obj):
+    """fallback for objects orjson doesn't serialize natively"""
+    return obj.__dict__
+
+
 def toJSONB(obj):
-    """turn arbitrary object into JSON string"""
-    json_out = json.dumps(obj, default=lambda o: o.__dict__)
-    return bytes(json_out, 'utf-8')
+    """turn arbitrary object into JSON bytes
+    (orjson handles dataclasses and str enums natively)"""
+    return orjson.dumps(obj, default=_object_dict)
 
 
 def fromJSONB(bytes):
     try:
-        json_in = str(bytes, 'utf-8')
-        if len(json_in) == 0:
+        if len(bytes) == 0:
             return None
-        return json.loads(json_in)
+        return orjson.loads(bytes)
     except FileNotFoundError:
         return None
 
 
+def tokenize(text):
+    """split command text into tokens, keeping "quoted strings" whole.
+    Like str.split(' '), always returns at least one (possibly empty) token.
+    """
+    tokens = [m.group(1) if m.group(1) is not None else m.group(2)
+              for m in token_re.finditer(text)]
+    return tokens or ['']
+
+
 @dataclass
 class Invite(object):
     id: str
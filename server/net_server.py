@@ -3,13 +3,19 @@ import logging
 import sys
 import os
 import traceback
+import asyncio
+import queue
 import threading
-import socketserver
-import json
+import multiprocessing
+import signal
+import socket
+import time
 import datetime
 from dataclasses import dataclass, field
 from typing import ClassVar
+from collections import OrderedDict
 import enum
+import orjson
 
 import net_common as nc
 import util
@@ -18,9 +24,9 @@ K = nc.K
 Mode = nc.Mode
 
 server_id = None
+server_id_json = None  # server_id as it appears in a client's init frame
 server_key = None
 server_protocol = None
-server_lock = threading.Lock()
 
 
 class Error(str, enum.Enum):
@@ -32,7 +38,8 @@ class Error(str, enum.Enum):
     multiple = 'multiple'
 
 
-@dataclass
+# slots: orjson serializes slotted dataclasses faster, and one is built per reply
+@dataclass(slots=True)
 class Message(object):
     lines: list
     mode: Mode = Mode.app
@@ -43,11 +50,59 @@ class Message(object):
     error_line: str = ''
 
 
+# replies that never change, serialized once: handlers can return
+# these bytes wherever they'd return a Message
+reply_no_user_id = nc.toJSONB(Message(lines=['User id required.'],
+                                      error_line='No user id.',
+                                      error=Error.user_id, mode=Mode.bye))
+reply_ban = nc.toJSONB(Message(lines=[],
+                               error_line='Too many failed attempts.',
+                               error=Error.login2, mode=Mode.bye))
+reply_multiple = nc.toJSONB(Message(lines=['One connection allowed at a time.'],
+                                    error_line='Multiple connections.',
+                                    error=Error.multiple, mode=Mode.bye))
+reply_goodbye = nc.toJSONB(Message(lines=["Goodbye."], mode=Mode.bye))
+reply_unknown = nc.toJSONB(Message(lines=["Unknown command."]))
+
 connected_users = set()
 
 
+@dataclass
+class PasswordAttempts(object):
+    """Per-account cap on password checks, whatever IP they come from.
+    The window starts on a 10-minute boundary and allows _limit checks
+    (one per slice on average) before refusing without running bcrypt.
+    """
+    window_start: float = 0.0
+    count: int = 0
+
+    _slice: ClassVar[int] = 600
+    _window: ClassVar[int] = 86400
+    _limit: ClassVar[int] = 144
+
+    def allow(self):
+        now = time.monotonic()
+        if now - self.window_start >= PasswordAttempts._window:
+            self.window_start = now - now % PasswordAttempts._slice
+            self.count = 0
+        if self.count >= PasswordAttempts._limit:
+            return False
+        self.count += 1
+        return True
+
+
+password_attempts = {}  # user_id: PasswordAttempts
+
+banned_addrs = set()  # checked on connect before any file or JSON work
+
+
 @dataclass
 class LoginHistory(object):
+    """Login attempts from one client IP.
+    Each change is recorded as an event and appended to a log file by
+    save(); the full JSON snapshot is only rewritten on a ban or after
+    _snapshot_events logged events, and load() replays the log on top of it.
+    """
     addr: str
     no_user_attempts: dict = field(default_factory=lambda: {})
     bad_password_attempts: dict = field(default_factory=lambda: {})
@@ -55,68 +110,220 @@ class LoginHistory(object):
     ban_count: int = 0
 
     _fail_limit: ClassVar[int] = 10
-
-    def banned(self, update, save=False):
+    _snapshot_events: ClassVar[int] = 100
+    # recently seen clients, so reconnects don't reload from disk;
+    # only touched from the event loop thread
+    _cache: ClassVar[OrderedDict] = OrderedDict()
+    _cache_size: ClassVar[int] = 10000
+
+    def __post_init__(self):
+        self._unsaved = []  # events not yet appended to log
+        self._logged = 0  # events in log since last snapshot
+        self._snapshot_due = False
+
+    def banned(self, update):
         is_banned = self.fail_count >= LoginHistory._fail_limit
+        if is_banned:
+            banned_addrs.add(self.addr)
         if is_banned and update:
-            self.ban_count += 1
-            if save:
-                self.save()
+            self._record('ban')
+            self._snapshot_due = True
         return is_banned
 
-    def no_user(self, user_id, save=False):
-        self.fail_count += 1
-        attempts = self.no_user_attempts.get(user_id, 0)
-        self.no_user_attempts[user_id] = attempts + 1
-        if save:
-            self.save()
-        return self.banned(True, save=save)
-
-    def fail_password(self, user_id, save=False):
-        self.fail_count += 1
-        attempts = self.bad_password_attempts.get(user_id, 0)
-        self.bad_password_attempts[user_id] = attempts + 1
-        if save:
-            self.save()
-        return self.banned(True, save=save)
-
-    def succeed_user(self, user_id, save=False):
-        self.fail_count = 0
-        if user_id in self.bad_password_attempts:
-            self.bad_password_attempts.pop(user_id)
-        if save:
-            self.save()
+    def no_user(self, user_id):
+        self._record('no_user', user_id)
+        return self.banned(True)
+
+    def fail_password(self, user_id):
+        self._record('bad_password', user_id)
+        return self.banned(True)
+
+    def succeed_user(self, user_id):
+        self._record('succeed', user_id)
+
+    def _record(self, kind, user_id=None):
+        event = {'t': time.time(), 'kind': kind}
+        if user_id is not None:
+            event['user'] = user_id
+        self._apply(event)
+        self._unsaved.append(event)
+
+    def _apply(self, event):
+        kind = event['kind']
+        user_id = event.get('user')
+        if kind == 'no_user':
+            self.fail_count += 1
+            self.no_user_attempts[user_id] = self.no_user_attempts.get(user_id, 0) + 1
+        elif kind == 'bad_password':
+            self.fail_count += 1
+            self.bad_password_attempts[user_id] = self.bad_password_attempts.get(user_id, 0) + 1
+        elif kind == 'succeed':
+            self.fail_count = 0
+            self.bad_password_attempts.pop(user_id, None)
+        elif kind == 'ban':
+            self.ban_count += 1
 
     @staticmethod
     def _json_path(addr):
         util.makeDirs(nc.net_dir)
         return os.path.join(nc.net_dir, f"client-{addr}.json")
 
+    @staticmethod
+    def _log_path(addr):
+        util.makeDirs(nc.net_dir)
+        return os.path.join(nc.net_dir, f"client-{addr}.log")
+
     @staticmethod
     def load(addr):
         path = LoginHistory._json_path(addr)
         if os.path.exists(path):
-            with open(path) as jsonF:
-                lh_data = json.load(jsonF)
-            return LoginHistory(**lh_data)
+            with open(path, 'rb') as jsonF:
+                lh_data = orjson.loads(jsonF.read())
+            history = LoginHistory(**lh_data)
         else:
-            return LoginHistory(addr)
+            history = LoginHistory(addr)
+        log_path = LoginHistory._log_path(addr)
+        if os.path.exists(log_path):
+            with open(log_path, 'rb') as logF:
+                for line in logF:
+                    try:
+                        history._apply(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        continue  # line torn by an interrupted write
+                    history._logged += 1
+        return history
 
-    def save(self):
-        with open(LoginHistory._json_path(self.addr), 'w') as jsonF:
-            json.dump(self, jsonF, default=lambda o: {k: v for k, v
-                                                      in o.__dict__.items() if v}, indent=4)
+    @staticmethod
+    def load_banned():
+        """fill banned_addrs from saved histories (a ban always writes a snapshot)"""
+        if not os.path.exists(nc.net_dir):
+            return
+        for filename in os.listdir(nc.net_dir):
+            if filename.startswith('client-') and filename.endswith('.json'):
+                LoginHistory.load(filename[len('client-'):-len('.json')]).banned(False)
+        logging.info("LoginHistory.load_banned: %i banned addresses" % len(banned_addrs))
 
+    @staticmethod
+    def cached(addr):
+        """return history for addr if in memory, else None (then use load)"""
+        history = LoginHistory._cache.get(addr)
+        if history is not None:
+            LoginHistory._cache.move_to_end(addr)
+        return history
 
-class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
-    pass
+    @staticmethod
+    def cache(history):
+        """keep history in memory; returns the cached one if another
+        connection from the same addr got there first
+        """
+        if LoginHistory._cache_size == 0:
+            return history  # caching off (several worker processes)
+        cache = LoginHistory._cache
+        history = cache.setdefault(history.addr, history)
+        cache.move_to_end(history.addr)
+        if len(cache) > LoginHistory._cache_size:
+            cache.popitem(last=False)
+        return history
 
+    def save(self):
+        """append unsaved events to log, rewriting snapshot when due"""
+        LoginHistory.write(self.addr, *self.take_unsaved())
+
+    def take_unsaved(self):
+        """Return (log lines, snapshot) to pass to write(), and mark them
+        saved.  Call this on the thread that changes the history, so the
+        snapshot and the events left unsaved never overlap.
+        """
+        events, self._unsaved = self._unsaved, []
+        self._logged += len(events)
+        if self._snapshot_due or self._logged >= LoginHistory._snapshot_events:
+            self._logged = 0
+            self._snapshot_due = False
+            # pass dataclass through to default so empty fields are dropped
+            snapshot = orjson.dumps(self, default=lambda o: {k: v for k, v
+                                                             in o.__dict__.items()
+                                                             if v and not k.startswith('_')},
+                                    option=orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_INDENT_2)
+            # snapshot already covers the events
+            return b'', snapshot
+        return b''.join(orjson.dumps(event) + b'\n' for event in events), None
 
-class UserHandler(socketserver.BaseRequestHandler):
-    def handle(self):
+    @staticmethod
+    def write(addr, log_lines, snapshot):
+        """disk half of save(), safe to run on another thread"""
+        if log_lines:
+            with open(LoginHistory._log_path(addr), 'a+b') as logF:
+                # an interrupted write can leave a torn last line; start on a
+                # fresh one so only that event is lost
+                if logF.tell() > 0:
+                    logF.seek(-1, os.SEEK_END)
+                    if logF.read(1) != b'\n':
+                        log_lines = b'\n' + log_lines
+                logF.write(log_lines)
+        if snapshot is not None:
+            with open(LoginHistory._json_path(addr), 'wb') as jsonF:
+                jsonF.write(snapshot)
+            log_path = LoginHistory._log_path(addr)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+
+
+save_queue = queue.Queue()  # (function, args) for the saver thread
+_saver_thread = None
+
+
+def save_later(func, *args):
+    """Queue func(*args) (a disk write) for the background saver thread,
+    so replies don't wait on disk.  In-memory state is already updated, and
+    writes happen in the order they were queued.
+    """
+    global _saver_thread
+    if _saver_thread is None:
+        # started on first use, so each forked worker gets its own
+        _saver_thread = threading.Thread(target=_saver, daemon=True)
+        _saver_thread.start()
+    save_queue.put((func, args))
+
+
+def _saver():
+    while True:
+        func, args = save_queue.get()
+        try:
+            func(*args)
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+        finally:
+            save_queue.task_done()
+
+
+class UserHandler(object):
+    """One instance per connected client, driven by the asyncio event loop.
+    All handlers share a single thread, so no locking is needed around
+    module-level state such as connected_users.
+    """
+    # the init message is a few dozen bytes; don't wait on more from a stranger
+    max_init_frame_size = 1024
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.client_address = writer.get_extra_info('peername')
+        # replies are small and interactive: send them without Nagle delay
+        sock = writer.get_extra_info('socket')
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, nc.socket_buffer_size)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, nc.socket_buffer_size)
+
+    async def handle(self):
         addr = self.client_address[0]
-        self.login_history = LoginHistory.load(addr)
-        if self.login_history.banned(True, save=True):
+        if addr in banned_addrs:
+            logging.debug("UserHandler.handle: ignoring banned IP %s" % addr)
+            return
+        self.login_history = LoginHistory.cached(addr)
+        if self.login_history is None:
+            self.login_history = LoginHistory.cache(await asyncio.to_thread(LoginHistory.load, addr))
+        if self.login_history.banned(True):
+            self._save_login_history()
             logging.warning("UserHandler.handle: ignoring banned IP %s" % addr)
             return
         port = self.client_address[1]
@@ -125,48 +332,82 @@ class UserHandler(socketserver.BaseRequestHandler):
         self.user = None
         logging.info("UserHandler: handle: connect (addr=%s)" % self.sender)
         running = True
-        while running:
-            try:
-                request = self._receive_data()
-                if request is None:
-                    running = False
-                    break
+        try:
+            while running:
                 try:
-                    if self.ready is None:  # assume init message
-                        response = self._process_init(request)
-                    elif self.user is None:
-                        response = self._process_login(request)
+                    request = await self._receive_data()
+                    if request is None:
+                        running = False
+                        break
+                    try:
+                        if self.ready is None:  # assume init message
+                            response = self._process_init(request)
+                        elif self.user is None:
+                            response = await self._process_login(request)
+                        else:
+                            response = await self.process_message(request)
+                    except Exception as e:
+                        traceback.print_exc(file=sys.stdout)
+                        # TODO: log error with message, error code to client
+                        await self._send_data(Message(lines=["Terminating session."],
+                                                      error_line=f"server side error ({e})",
+                                                      error=Error.server1, mode=Mode.bye))
+                        response = None
+                    if response is None:
+                        running = False
                     else:
-                        response = self.process_message(request)
+                        await self._send_data(response)
+                except ConnectionError:
+                    # client went away (e.g. reset), nobody to tell
+                    running = False
                 except Exception as e:
                     traceback.print_exc(file=sys.stdout)
                     # TODO: log error with message, error code to client
-                    self._send_data(Message(lines=["Terminating session."],
-                                            error_line=f"server side error ({e})",
-                                            error=Error.server1, mode=Mode.bye))
-                if response is None:
+                    try:
+                        await self._send_data(Message(lines=["Terminating session."],
+                                                      error_line=f"server side error ({e})",
+                                                      error=Error.server2, mode=Mode.bye))
+                    except ConnectionError:
+                        pass
                     running = False
-                else:
-                    self._send_data(response)
-            except Exception as e:
-                traceback.print_exc(file=sys.stdout)
-                # TODO: log error with message, error code to client
-                self._send_data(Message(lines=["Terminating session."],
-                                       error_line=f"server side error ({e})",
-                                       error=Error.server2, mode=Mode.bye))
-        if self.user is not None:
-            user_id = self.user.id
-            with server_lock:
-                connected_users.remove(user_id)
-        else:
-            user_id = '?'
-        logging.info("user_handler: disconnect %s (addr=%s)" % (user_id, self.sender))
-
-    def _receive_data(self):
-        return nc.fromJSONB(self.request.recv(1024))
-
-    def _send_data(self, data):
-        self.request.sendall(nc.toJSONB(data))
+        finally:
+            # always release the user, or they can't log in again
+            if self.user is not None:
+                user_id = self.user.id
+                connected_users.discard(user_id)
+            else:
+                user_id = '?'
+            logging.info("user_handler: disconnect %s (addr=%s)" % (user_id, self.sender))
+
+    async def _receive_data(self):
+        try:
+            header = await self.reader.readexactly(nc.frame_header.size)
+            size, = nc.frame_header.unpack(header)
+            max_size = nc.max_frame_size if self.ready else UserHandler.max_init_frame_size
+            if size > max_size:
+                logging.warning("UserHandler: frame too large (%i bytes) from %s" % (size, self.sender))
+                return None
+            buf = await self.reader.readexactly(size)
+            # cheap check so port scanners don't cost a JSON parse
+            if self.ready is None and server_id_json not in buf[:128]:
+                logging.warning("UserHandler: bad init frame from %s" % self.sender)
+                return None
+            return nc.fromJSONB(buf)
+        except asyncio.IncompleteReadError:
+            return None  # client closed connection
+
+    async def _send_data(self, data):
+        # data is a Message or one of the prebuilt reply_* byte strings
+        buf = data if isinstance(data, bytes) else nc.toJSONB(data)
+        # writelines joins header and body into one buffer before sending
+        # (3.12+ selector transports hand both to sendmsg instead)
+        self.writer.writelines((nc.frame_header.pack(len(buf)), buf))
+        await self.writer.drain()
+
+    def _save_login_history(self):
+        # take the data here on the event loop; only the file I/O is deferred
+        save_later(LoginHistory.write, self.login_history.addr,
+                   *self.login_history.take_unsaved())
 
     def _process_init(self, data):
         client_id = data.get('id')
@@ -183,124 +424,223 @@ class UserHandler(socketserver.BaseRequestHandler):
             # TODO: record history in case want to ban
             return None  # poser, ignore them
 
-    def _process_login(self, data):
+    async def _process_login(self, data):
         user_id, password, invite_code = data['login']
         if user_id == '':
-            return Message(lines=['User id required.'],
-                           error_line='No user id.',
-                           error=Error.user_id, mode=Mode.bye)
-
-        def error_ban():
-            return Message(lines=[],
-                           error_line='Too many failed attempts.',
-                           error=Error.login2, mode=Mode.bye)
+            return reply_no_user_id
 
         def error_login_failed():
             return Message(lines=self.login_fail_lines(),
                            error_line='Login failed.',
                            error=Error.login1, mode=Mode.login)
 
-        user = nc.User.load(user_id)
+        user = await asyncio.to_thread(nc.User.load, user_id)
         if user is None:
-            invite = nc.Invite.load(user_id)
+            invite = await asyncio.to_thread(nc.Invite.load, user_id)
             if invite is None:
                 logging.warning("process_login: login failed: no user '%s`" % user_id)
                 # when failing don't tell that have wrong user id
-                banned = self.login_history.no_user(user_id, save=True)
+                banned = self.login_history.no_user(user_id)
+                self._save_login_history()
                 if banned:
                     logging.info(f"ban {self.sender}")
-                    return error_ban()
+                    return reply_ban
                 return error_login_failed()
             else:
                 # process new user with invite
                 if invite.code != invite_code:
                     logging.warning(f"process_login: invalid invite code %s" % invite_code)
-                    banned = self.login_history.no_user(user_id, save=True)
+                    banned = self.login_history.no_user(user_id)
+                    self._save_login_history()
                     if banned:
                         logging.info("process_login: ban %s" % self.sender)
-                        return error_ban()
+                        return reply_ban
                     else:
                         return error_login_failed()
                 else:
                     # create and save user
                     user = nc.User(user_id)
-                    user.hash_password(password)
-                    user.save()
-                    invite.delete()
-        with server_lock:
-            if user_id in connected_users:
-                return Message(lines=['One connection allowed at a time.'],
-                               error_line='Multiple connections.',
-                               error=Error.multiple, mode=Mode.bye)
-        if not user.matchPassword(password):
+                    await asyncio.to_thread(user.hash_password, password)
+                    save_later(user.save)
+                    save_later(invite.delete)
+        if user_id in connected_users:
+            return reply_multiple
+        attempts = password_attempts.setdefault(user_id, PasswordAttempts())
+        if not attempts.allow():
+            logging.warning(f"password attempt limit reached for '{user_id}'")
+            return reply_ban
+        # bcrypt is slow on purpose, keep it off the event loop
+        if not await asyncio.to_thread(user.match_password, password):
             logging.warning(f"bad password for '{user_id}'")
-            banned = self.login_history.fail_password(user_id, save=True)
+            banned = self.login_history.fail_password(user_id)
+            self._save_login_history()
             if banned:
                 logging.info(f"ban {self.sender}")
-                return error_ban()
+                return reply_ban
             else:
                 return error_login_failed()
         self.user = user
-        with server_lock:
-            connected_users.add(user_id)
-        self.login_history.succeed_user(user_id, save=True)
-        return process_login_success(user_id)
+        password_attempts.pop(user_id, None)
+        connected_users.add(user_id)
+        self.login_history.succeed_user(user_id)
+        self._save_login_history()
+        return await self.process_login_success(user_id)
 
-def prompt_request(self, lines, prompt: str, choices: dict):
-    self._send_data(Message(lines=lines, prompt=prompt, choices=choices))
-    return self._receive_data()
+    async def prompt_request(self, lines, prompt: str, choices: dict):
+        await self._send_data(Message(lines=lines, prompt=prompt, choices=choices))
+        return await self._receive_data()
 
     # base implementation for when testing net_client/net_server
     # NOTE: must be overridden by actual app (see client/server)
 
-def init_success_lines(self):
-    """OVERRIDE in subclass
-    First server message lines that user sees.  Should tell them to log in.
+    def init_success_lines(self):
+        """OVERRIDE in subclass
+        First server message lines that user sees.  Should tell them to log in.
+        """
+        return ['Generic Server.', 'Please log in.']
+
+    def login_fail_lines(self):
+        """OVERRIDE in subclass
+        Login failure message lines back to user.
+        """
+        return ['please try again.']
+
+    async def process_login_success(self, user_id):
+        """OVERRIDE in subclass
+        First method called on successful login.
+        Should do any user initialization and then return Message.
+        """
+        return Message(lines=[f"Welcome {user_id}."])
+
+    async def process_message(self, data):
+        """OVERRIDE in subclass
+        Called on all subsequent Cmd messages from client.
+        Should do any processing and return Message.
+        """
+        if 'text' in data:
+            cmd = nc.tokenize(data['text'])
+            handler = commands.get(cmd[0], UserHandler.cmd_unknown)
+            return await handler(self, cmd)
+
+    async def cmd_bye(self, cmd):
+        return reply_goodbye
+
+    async def cmd_unknown(self, cmd):
+        return reply_unknown
+
+
+# command (and alias) => UserHandler coroutine taking (self, cmd)
+commands = {'bye': UserHandler.cmd_bye, 'logout': UserHandler.cmd_bye}
+
+
+async def _serve(host, port, handler_class, console=True, reuse_port=None):
+    async def handle(reader, writer):
+        try:
+            await handler_class(reader, writer).handle()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    server = await asyncio.start_server(handle, host, port, reuse_port=reuse_port)
+    async with server:
+        logging.info("Server.start: server running (%s:%s, pid %i)" % (host, port, os.getpid()))
+        if console:
+            running = True
+            while running:
+                # read console without blocking the event loop
+                text = await asyncio.to_thread(input)
+                if text in ['q', 'quit', 'exit']:
+                    running = False
+        else:
+            # start() stops workers with SIGTERM; return normally so queued
+            # writes still get done
+            stopping = asyncio.Event()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+            await stopping.wait()
+    # finish queued disk writes
+    await asyncio.to_thread(save_queue.join)
+    logging.info('server shutdown.')
+
+
+class SharedUsers(object):
+    """connected_users when running several worker processes: a set-like
+    view over a multiprocessing.Manager dict, so one connection per user
+    holds across workers
     """
-    return ['Generic Server.', 'Please log in.']
+    def __init__(self, users):
+        self.users = users
 
-def login_fail_lines(self):
-    """OVERRIDE in subclass
-    Login failure message lines back to user.
-    """
-    return ['please try again.']
+    def __contains__(self, user_id):
+        return user_id in self.users
 
-def process_login_success(self, user_id):
-    """OVERRIDE in subclass
-    First method called on successful login.
-Should do any user initialization and then return Message.
-    """
-    return Message(lines=[f"Welcome {user_id}."])
+    def __iter__(self):
+        return iter(self.users.keys())
+
+    def add(self, user_id):
+        self.users[user_id] = True
+
+    def discard(self, user_id):
+        self.users.pop(user_id, None)
 
-def process_message(self, data):
-    """OVERRIDE in subclass
-Called on all subsequent Cmd messages from client.
-    Should do any processing and return Message.
-    """
-    if 'text' in data:
-        cmd = data['text'].split(' ')
-        if cmd[0] in ['bye', 'logout']:
-            return Message(lines=["Goodbye."], mode=Mode.bye)
-        else:
-            return Message(lines=["Unknown command."])
 
-def start(host, port, _id, key, protocol, handler_class):
-    global server_id, server_key, server_protocol
+def _run_worker(host, port, handler_class):
+    asyncio.run(_serve(host, port, handler_class, console=False, reuse_port=True))
+
+
+def _console():
+    running = True
+    while running:
+        text = input()
+        if text in ['q', 'quit', 'exit']:
+            running = False
+
+
+def start(host, port, _id, key, protocol, handler_class, workers=1):
+    """Run server until 'q' is typed on the console.
+    With workers > 1, that many forked processes each accept connections
+    on the same port (SO_REUSEPORT, so Linux/BSD only) and the kernel
+    spreads clients between them.  Only connected_users is shared: game
+    state kept in module globals by the handler is per worker (e.g. users
+    on other workers have no Player in server.py's players dict, so 'who'
+    lists them by login id).
+    Login histories aren't cached then, so each connection reads what
+    other workers have saved; writes aren't locked between workers, so
+    one worker's snapshot can drop another's not yet snapshotted log
+    events.  The per-account password cap (password_attempts) is per
+    worker, so an account gets up to workers * PasswordAttempts._limit
+    checks per window.
+    """
+    global server_id, server_id_json, server_key, server_protocol, connected_users
     server_id = _id
+    server_id_json = orjson.dumps(_id)
     server_key = key
     server_protocol = protocol
-    with Server((host, port), handler_class) as server:
-        logging.info("Server.start: server running (%s:%s)" % (host, port))
-        server_thread = threading.Thread(target=server.serve_forever)
-        server_thread.daemon = True
-        server_thread.start()
-        running = True
-        while running:
-            text = input()
-            if text in ['q', 'quit', 'exit']:
-                running = False
-        server.shutdown()
-        logging.info('server shutdown.')
+    LoginHistory.load_banned()
+    if workers == 1:
+        asyncio.run(_serve(host, port, handler_class))
+        return
+    # a per-process cache would never see the other workers' events
+    LoginHistory._cache_size = 0
+    context = multiprocessing.get_context('fork')
+    with context.Manager() as manager:
+        connected_users = SharedUsers(manager.dict())
+        try:
+            processes = [context.Process(target=_run_worker, args=(host, port, handler_class),
+                                         daemon=True)
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            _console()
+            for process in processes:
+                process.terminate()
+                process.join()
+        finally:
+            # the Manager's proxy is dead once it shuts down
+            connected_users = set()
+    logging.info('server shutdown.')
 
 
 if __name__ == '__main__':
@@ -77,6 +77,15 @@ money_start = 1000
 
 compass_txts = {'n': 'North', 'e': 'East', 's': 'South', 'w': 'West', 'u': 'Up', 'd': 'Down'}
 
+# replies that never change, serialized once (see net_server)
+reply_cant_go = net_common.toJSONB(Message(lines=["Ye cannot travel that way."]))
+reply_go_where = net_common.toJSONB(Message(lines=["Go where?"]))
+reply_not_understood = net_common.toJSONB(Message(lines=["I didn't understand that.  Try something else."]))
+reply_stay = net_common.toJSONB(Message(lines=["Thanks for sticking around."]))
+reply_done = net_common.toJSONB(Message(lines=["Done."]))
+reply_cheatcode = net_common.toJSONB(Message(lines=["↑ ↑ ↓ ↓ ← → ← → B A"]))
+reply_room_number = net_common.toJSONB(Message(lines=["(Room number required after '#'.)"]))
+
 
 @dataclass
 class Room(object):
@@ -90,6 +99,18 @@ class Room(object):
     food: int = 0
     alignment: str = "neutral"  # default unless set to another guild
 
+    def __post_init__(self):
+        # room data is static once loaded: build the display text once here
+        # rather than on every look/move
+        # check for/trim room flags (currently only '->'):
+        temp = self.name.rfind("|")
+        self.display_name = self.name
+        self.display_flags = ''
+        if temp != -1:
+            self.display_name = self.name[:temp]
+            self.display_flags = self.name[temp + 1:]
+        self._exits_txts = {debug: self._build_exits_txt(debug) for debug in (False, True)}
+
     def __str__(self):
         return f'#{self.number} {self.name}\n' \
                f'{self.desc}\n{self.exits}'
@@ -100,6 +121,9 @@ class Room(object):
         :param debug: display room #s if True
         :return: joined list of exits
         """
+        return self._exits_txts[debug]
+
+    def _build_exits_txt(self, debug: bool):
         # connection/transport names, index by (connection, transport)
         # rc = 1: Up     rt != 0: Room #
         # rc = 2: Down   rt == 0: Shoppe
@@ -272,8 +296,6 @@ class Rations(object):
             return None
 
 
-server_lock = threading.Lock()
-
 def players_in_room(room_id: int, exclude_id: str | None):
     """
     Return a dict of player login id's in the room
@@ -282,8 +304,7 @@ def players_in_room(room_id: int, exclude_id: str | None):
     :param exclude_id: player to exclude (often the player executing the command) to not be listed
     :return: dict of players
     """
-    with server_lock:
-        players_in_room = room_players[room_id]
+    players_in_room = room_players[room_id]
     if exclude_id is not None:
         players_in_room = players_in_room.difference({exclude_id})
         logging.debug("players_in_room: excluding %s" % exclude_id)
@@ -497,9 +518,8 @@ class Player():
 
 
     def connect(self):
-        with server_lock:
-            room_players[self.room].add(self.id)
-            # TODO: notify other players of connection
+        room_players[self.room].add(self.id)
+        # TODO: notify other players of connection
 
 
     def move(self, next_room: int, direction=None):
@@ -511,30 +531,28 @@ class Player():
         "<player> disappears in a flash of light" message is used instead
         """
         current_room = self.room
-        with server_lock:
-            logging.debug("Player.move: Before remove: %s" % room_players[current_room])
-            room_players[current_room].remove(self.id)
-            logging.debug("Player.move: After remove: %s" % room_players[current_room])
-
-            self.room = next_room
-            logging.debug("Player.move: Before add: %s" % room_players[current_room])
-            room_players[self.room].add(self.id)
-            logging.debug("Player.move: After add: %s" % room_players[current_room])
-            logging.debug('Player.move: Moved %s from %s to %s' % (self.name, current_room, self.room))
-            if direction is None:
-                print(f'[{self.name} disappears in a flash of light.')
-            else:
-                print(f"{self.name} moves {compass_txts[direction]}.")
+        logging.debug("Player.move: Before remove: %s" % room_players[current_room])
+        room_players[current_room].remove(self.id)
+        logging.debug("Player.move: After remove: %s" % room_players[current_room])
+
+        self.room = next_room
+        logging.debug("Player.move: Before add: %s" % room_players[current_room])
+        room_players[self.room].add(self.id)
+        logging.debug("Player.move: After add: %s" % room_players[current_room])
+        logging.debug('Player.move: Moved %s from %s to %s' % (self.name, current_room, self.room))
+        if direction is None:
+            print(f'[{self.name} disappears in a flash of light.')
+        else:
+            print(f"{self.name} moves {compass_txts[direction]}.")
 
 
     def disconnect(self):
-        with server_lock:
-            room_players[self.room].remove(self.id)
-            # increment times played:
-            self.times_played += 1
-            logging.info("Player.disconnect: %s disconnected. Times played: %i." % (players[self.id].name,
-                                                                                    self.times_played))
-            return Message(lines=[f'{players[self.id].name} falls asleep.'])
+        room_players[self.room].remove(self.id)
+        # increment times played:
+        self.times_played += 1
+        logging.info("Player.disconnect: %s disconnected. Times played: %i." % (players[self.id].name,
+                                                                                self.times_played))
+        return Message(lines=[f'{players[self.id].name} falls asleep.'])
 
     @staticmethod
     def _json_path(user_id):
@@ -578,7 +596,7 @@ class PlayerHandler(net_server.UserHandler):
     def login_fail_lines(self):
         return ['Please try again.']
 
-    def room_msg(self, lines: list, changes: dict):
+    def room_msg(self, lines: list, changes: dict | None = None):
         """
         Display the room description and contents to the player in the room
 
@@ -593,20 +611,11 @@ class PlayerHandler(net_server.UserHandler):
             logging.warning("room_msg: Room %i does not exist" % self.player.room)
 
         debug = self.player.flag['debug']
-        exits_txt = room.exits_Txt(debug)
         lines2 = list(lines)
 
         # display room header
-        # check for/trim room flags (currently only '->'):
-        temp = room.name.rfind("|")
-        room_name = room.name
-        room_flags = ''
-        if temp != -1:
-            room_name = room.name[:temp]
-            room_flags = room.name[temp + 1:]
-
         temp = str(room.alignment).title()
-        lines2.append(f"{f'#{room.number} ' if debug else ''}{room_name} [{temp}]\n")
+        lines2.append(f"{f'#{room.number} ' if debug else ''}{room.display_name} [{temp}]\n")
 
         # FIXME: is anything wrong with this?
         if self.player.flag['room_descs']:
@@ -650,8 +659,7 @@ class PlayerHandler(net_server.UserHandler):
 
         # TODO: add grammatical list item (SOME MELONS, AN ORANGE)
 
-        debug = self.player.flag['debug']
-        exits_txt = room.exitsTxt(debug)
+        exits_txt = room.exits_txt(debug)
         if exits_txt is not None:
             lines2.append(f"Ye may travel: {exits_txt}\n")
             # ryan: list exit dirs and room #s
@@ -686,9 +694,9 @@ class PlayerHandler(net_server.UserHandler):
             other_players = ', '.join([players[id].name for id in other_player_ids])
             temp = 'is' if len(other_players) == 1 else 'are'
             lines2.append(f"{other_players} {temp} here.")
-        return Message(lines=lines2, changes=changes)
+        return Message(lines=lines2, changes=changes or {})
 
-    def process_login_success(self, user_id):
+    async def process_login_success(self, user_id):
         player = Player.load(user_id)
         logging.info("process_login_success: Login %s ('%s') (IP: %s)" \
                      % (user_id, self.player.name, self.sender))
@@ -699,7 +707,8 @@ class PlayerHandler(net_server.UserHandler):
             logging.debug("process_login_success: Running create_player...")
             valid_name = False
             while not valid_name:
-                reply = self.promptRequest(lines=["Choose your adventurer's name."], prompt='Name? ')
+                reply = await self.prompt_request(lines=["Choose your adventurer's name."], prompt='Name? ',
+                                                  choices={})
                 name = reply['text'].strip()
                 if name != '':  # TODO: limitations on valid names
                     valid_name = True
@@ -731,15 +740,15 @@ class PlayerHandler(net_server.UserHandler):
             logging.debug("%s: %s" % (k, v))
 
         # FIXME
-        changes = {K.room_name: game_map.rooms[self.player.room].name,
-                   K.silver: self.player.silver, K.hit_points: self.player.hit_points,
-                   K.experience: self.player.experience}
+        changes = {'room_name': game_map.rooms[self.player.room].name,
+                   'silver': self.player.silver, 'hit_points': self.player.hit_points,
+                   'experience': self.player.experience}
         self.player.connect()
-        return self.roomMsg(lines, changes)
+        return self.room_msg(lines, changes)
 
-    def process_message(self, data):
+    async def process_message(self, data):
         if 'text' in data:
-            cmd = data['text'].lower().split(' ')
+            cmd = net_common.tokenize(data['text'].lower())
             logging.debug("process_message: ID=%s, command=%s" % (self.player.id, cmd))
             # update last command to repeat with Return/Enter
             # if an invalid command, set to None later
@@ -748,156 +757,12 @@ class PlayerHandler(net_server.UserHandler):
             logging.info(f'{self.player.last_command=}')
 
             # TODO: handle commands with parser etc.
-
-            # movement
-            if cmd[0] in compass_txts:
-                room = game_map.rooms[self.player.room]
-                logging.debug("parser: current room #: %s" % self.player.room)
-                direction = cmd[0]
-                logging.debug("parser: direction: %s" % direction)
-                # 'rooms' is a list of Room objects?
-                logging.debug("parser: exits: %s" % room.exits)
-                """
-                >>> exits = {'n': 1, 's': 3}
-                
-                >>> exits.keys()
-                dict_keys(['n', 's'])
-                >>> exits['n']
-                1
-                """
-                # cmd.insert(0, 'go') probably not necessary
-                # json data (dict):
-                # check if 'direction' is in room exits
-                if direction in room.exits:  # rooms[self.player.room].exits.keys():
-                    logging.debug("parser: move %s => %s" % (direction, self.player.room))
-                    # delete player from list of players in current room, then
-                    # add player to list of players in room they moved to
-                    self.player.move(room.exits[direction], direction)
-                    # FIXME: maybe only at quit
-                    # self.player.save()
-                    room_name = game_map.rooms[self.player.room].name
-                    return self.roomMsg(lines=[f"You move {compass_txts[direction]}."],
-                                        changes={K.room_name: room_name})
-
-            """
-            This is the way the original Apple code handled up/down exits.
-            I'm fully aware up/down exits could just be a room number, or 0
-            for no connection--my self-written level 8 map does exactly this.
-            """
-            if cmd[0][:1] == 'u' or cmd[0][:1] == 'd':
-                room = game_map.rooms[self.player.room]
-                room_exits = room.exits
-                room_connection = room_exits.get('rc', 0)
-                room_transport = room_exits.get('rt', 0)
-                # example: level 1, room 20
-                if cmd[0] == 'u' and room_connection == 1:
-                    if room_transport != 0:
-                        logging.debug("parser: %s moves Up to %i" % (self.player.name, room_transport))
-                        # self.player.room = room_transport
-                        self.player.move(next_room=room_transport, direction='u')
-                        return
-                    else:
-                        logging.debug("parser: %s moves Up to Shoppe" % self.player.name)
-                        self.player.move(next_room=room_transport, direction='u')
-                        # don't change self.player.room, return them to where they left
-                        return Message(lines=["TODO: write Shoppe routine..."])
-                if cmd[0] == 'd' and room_connection == 2:
-                    if room_transport != 0:
-                        logging.debug("parser: %s moves Down to %i" % (self.player.name, room_transport))
-                        self.player.move(next_room=room_transport, direction='d')
-
-                        # get new room desc:
-                        # FIXME: TypeError: 'Room' object is not subscriptable
-                        """
-                        temp = game_map.rooms[number]
-                        logging.info(f"room info: {temp}")
-                        desc = temp["desc"]
-                        logging.info(f"desc: {desc}")
-                        """
-                        desc = "bla"
-                        # FIXME: see server.py, line 24:
-                        #  thought maybe this would show the new room desc
-                        return Message(lines=["You move down."],
-                                       changes={K.desc: desc})
-                    else:
-                        logging.debug("parser: %s moves Down to Shoppe" % self.player.name)
-                        self.player.move(next_room=room_transport, direction='d')
-
-                        # don't change self.player.room, return them to where they left
-                        return Message(lines=["TODO: write Shoppe routine..."])
-
-                else:
-                    return Message(lines=["Ye cannot travel that way."])
-
-            if cmd[0] in ['l', 'look']:
-                room = game_map.rooms[self.player.room]
-                return self.roomMsg(lines=room.desc)
-
-            if cmd[0] in ['bye', 'logout', 'quit']:
-                temp = net_server.UserHandler.prompt_request(self, lines=[], prompt='Really quit? ',
-                                                            choices={'y': 'yes', 'n': 'no'})
-                # returns a Cmd object?
-                logging.info(f'{temp=}')
-                # extract value from returned dict, e.g.: temp={'text': 'y'}
-                if temp.get('text') == 'y':
-                    self.player.save()
-                    self.player.disconnect()
-                    return Message(lines=["Bye for now."], mode=Mode.bye)
-                else:
-                    return Message(lines=["Thanks for sticking around."])
-
-            if cmd[0] in ['?', 'hel', 'help']:
-                from tada_utilities import game_help
-                game_help(self, cmd)
-                return Message(lines=["Done."])
-
-            if cmd[0] in ['cheatcode']:
-                return Message(lines=["↑ ↑ ↓ ↓ ← → ← → B A"])
-
-            # toggle room descriptions:
-            if cmd[0] in ['r']:
-                logging.info(f"{self.player.flag['room_descs']}")
-                self.player.flag['room_descs'] = not self.player.flag['room_descs']
-                temp = self.player.flag['room_descs']
-                logging.info(f'Room descriptions: {temp}.')
-                return Message(lines=[f'[Room descriptions are now '
-                                      f'{"off" if temp is False else "on"}.]'])
-
-            if cmd[0] == 'who':
-                from server import net_server as ns
-                lines = ["\nWho's on:"]
-                count = 0
-                for login_id in ns.connected_users:
-                    lines.append(f'{count + 1:2}) {players[login_id].name}')
-                    count += 1
-                return Message(lines=lines)
-
+            handler = commands.get(cmd[0])
             # really this is just a debugging tool to save shoe leather:
-            if cmd[0][:1] == "#":
-                temp = cmd[0][1:]
-                if temp.isdigit() is False:
-                    return Message(lines=["(Room number required after '#'.)"])
-                val = int(temp)
-                try:
-                    # get destination room data:
-                    dest = game_map.rooms[val]
-                    room_num = dest.number
-                    # delete player id from list of players in current room,
-                    # add player id to list of players in room they moved to
-                    # 'direction' is None, so display "{player} disappears in a flash of light."
-                    self.player.move(room_num, direction=None)
-
-                    # move player there:
-                    self.player.room = room_num
-                    logging.debug("parser: moved to room #%i, %s" % (room_num, self.player.room))
-                    # TODO: something like this displayed to other players would be nice to indicate teleportation:
-                    #  Message([f"{self.player.name} disappears in a flash of light.")
-                    # TODO: display new room description
-                    return Message(lines=[f"You teleport to room #{val}, {dest.name}.\n"])
-                    # changes={"prompt": "Prompt:", "status_line": 'Status Line'})
-                except KeyError:
-                    return Message(lines=[f'Teleport: No such room yet (#{val}, '
-                                          f'max of {max(game_map.rooms)}).'])
+            if handler is None and cmd[0][:1] == "#":
+                handler = PlayerHandler.cmd_teleport
+            if handler is not None:
+                return await handler(self, cmd)
 
             """
             FIXME: Under consideration, but not sure how to set this up
@@ -923,14 +788,178 @@ class PlayerHandler(net_server.UserHandler):
             """
             # invalidate repeating last_command
             self.player.last_command = None
-            return Message(lines=["I didn't understand that.  Try something else."])
+            return reply_not_understood
         else:
             logging.error("unexpected message")
             return Message(lines=["Unexpected message."], mode=Mode.bye)
 
-        # otherwise, not a valid server message?:
-        logging.error("parser: unexpected message '%s'" % cmd)
-        return Message(lines=["parser: Unexpected message '{cmd}'."], mode=Mode.bye)
+    async def cmd_go(self, cmd):
+        """'go <direction>': same as typing the direction by itself"""
+        if len(cmd) > 1 and cmd[1] in compass_txts:
+            return await self.cmd_move(cmd[1:])
+        return reply_go_where
+
+    async def cmd_move(self, cmd):
+        # movement
+        room = game_map.rooms[self.player.room]
+        logging.debug("parser: current room #: %s" % self.player.room)
+        # 'up'/'down' are table aliases of 'u'/'d'
+        direction = cmd[0][:1]
+        logging.debug("parser: direction: %s" % direction)
+        # 'rooms' is a list of Room objects?
+        logging.debug("parser: exits: %s" % room.exits)
+        """
+        >>> exits = {'n': 1, 's': 3}
+
+        >>> exits.keys()
+        dict_keys(['n', 's'])
+        >>> exits['n']
+        1
+        """
+        # json data (dict):
+        # check if 'direction' is in room exits
+        if direction in room.exits:  # rooms[self.player.room].exits.keys():
+            logging.debug("parser: move %s => %s" % (direction, self.player.room))
+            # delete player from list of players in current room, then
+            # add player to list of players in room they moved to
+            self.player.move(room.exits[direction], direction)
+            # FIXME: maybe only at quit
+            # self.player.save()
+            room_name = game_map.rooms[self.player.room].name
+            return self.room_msg(lines=[f"You move {compass_txts[direction]}."],
+                                changes={'room_name': room_name})
+
+        """
+        This is the way the original Apple code handled up/down exits.
+        I'm fully aware up/down exits could just be a room number, or 0
+        for no connection--my self-written level 8 map does exactly this.
+        """
+        room_exits = room.exits
+        room_connection = room_exits.get('rc', 0)
+        room_transport = room_exits.get('rt', 0)
+        # example: level 1, room 20
+        if direction == 'u' and room_connection == 1:
+            if room_transport != 0:
+                logging.debug("parser: %s moves Up to %i" % (self.player.name, room_transport))
+                # self.player.room = room_transport
+                self.player.move(next_room=room_transport, direction='u')
+                return
+            else:
+                logging.debug("parser: %s moves Up to Shoppe" % self.player.name)
+                self.player.move(next_room=room_transport, direction='u')
+                # don't change self.player.room, return them to where they left
+                return Message(lines=["TODO: write Shoppe routine..."])
+        if direction == 'd' and room_connection == 2:
+            if room_transport != 0:
+                logging.debug("parser: %s moves Down to %i" % (self.player.name, room_transport))
+                self.player.move(next_room=room_transport, direction='d')
+
+                # get new room desc:
+                # FIXME: TypeError: 'Room' object is not subscriptable
+                """
+                temp = game_map.rooms[number]
+                logging.info(f"room info: {temp}")
+                desc = temp["desc"]
+                logging.info(f"desc: {desc}")
+                """
+                desc = "bla"
+                # FIXME: see server.py, line 24:
+                #  thought maybe this would show the new room desc
+                return Message(lines=["You move down."],
+                               changes={'desc': desc})
+            else:
+                logging.debug("parser: %s moves Down to Shoppe" % self.player.name)
+                self.player.move(next_room=room_transport, direction='d')
+
+                # don't change self.player.room, return them to where they left
+                return Message(lines=["TODO: write Shoppe routine..."])
+        return reply_cant_go
+
+    async def cmd_look(self, cmd):
+        room = game_map.rooms[self.player.room]
+        return self.room_msg(lines=room.desc)
+
+    async def cmd_quit(self, cmd):
+        temp = await self.prompt_request(lines=[], prompt='Really quit? ',
+                                         choices={'y': 'yes', 'n': 'no'})
+        # returns a Cmd object?
+        logging.info(f'{temp=}')
+        # extract value from returned dict, e.g.: temp={'text': 'y'}
+        if temp.get('text') == 'y':
+            self.player.save()
+            self.player.disconnect()
+            return Message(lines=["Bye for now."], mode=Mode.bye)
+        else:
+            return reply_stay
+
+    async def cmd_help(self, cmd):
+        from tada_utilities import game_help
+        await game_help(self, cmd)
+        return reply_done
+
+    async def cmd_cheatcode(self, cmd):
+        return reply_cheatcode
+
+    async def cmd_room_descs(self, cmd):
+        # toggle room descriptions:
+        logging.info(f"{self.player.flag['room_descs']}")
+        self.player.flag['room_descs'] = not self.player.flag['room_descs']
+        temp = self.player.flag['room_descs']
+        logging.info(f'Room descriptions: {temp}.')
+        return Message(lines=[f'[Room descriptions are now '
+                              f'{"off" if temp is False else "on"}.]'])
+
+    async def cmd_who(self, cmd):
+        from server import net_server as ns
+        lines = ["\nWho's on:"]
+        count = 0
+        for login_id in ns.connected_users:
+            # with several workers, users on other workers have no Player here
+            player = players.get(login_id)
+            lines.append(f'{count + 1:2}) {player.name if player else login_id}')
+            count += 1
+        return Message(lines=lines)
+
+    async def cmd_teleport(self, cmd):
+        # really this is just a debugging tool to save shoe leather:
+        temp = cmd[0][1:]
+        if temp.isdigit() is False:
+            return reply_room_number
+        val = int(temp)
+        try:
+            # get destination room data:
+            dest = game_map.rooms[val]
+            room_num = dest.number
+            # delete player id from list of players in current room,
+            # add player id to list of players in room they moved to
+            # 'direction' is None, so display "{player} disappears in a flash of light."
+            self.player.move(room_num, direction=None)
+
+            # move player there:
+            self.player.room = room_num
+            logging.debug("parser: moved to room #%i, %s" % (room_num, self.player.room))
+            # TODO: something like this displayed to other players would be nice to indicate teleportation:
+            #  Message([f"{self.player.name} disappears in a flash of light.")
+            # TODO: display new room description
+            return Message(lines=[f"You teleport to room #{val}, {dest.name}.\n"])
+            # changes={"prompt": "Prompt:", "status_line": 'Status Line'})
+        except KeyError:
+            return Message(lines=[f'Teleport: No such room yet (#{val}, '
+                                  f'max of {max(game_map.rooms)}).'])
+
+
+# command (and alias) => PlayerHandler coroutine taking (self, cmd)
+commands = {'g': PlayerHandler.cmd_go, 'go': PlayerHandler.cmd_go,
+            'up': PlayerHandler.cmd_move, 'down': PlayerHandler.cmd_move,
+            'l': PlayerHandler.cmd_look, 'look': PlayerHandler.cmd_look,
+            'bye': PlayerHandler.cmd_quit, 'logout': PlayerHandler.cmd_quit,
+            'quit': PlayerHandler.cmd_quit,
+            '?': PlayerHandler.cmd_help, 'hel': PlayerHandler.cmd_help,
+            'help': PlayerHandler.cmd_help,
+            'cheatcode': PlayerHandler.cmd_cheatcode,
+            'r': PlayerHandler.cmd_room_descs,
+            'who': PlayerHandler.cmd_who}
+commands.update(dict.fromkeys(compass_txts, PlayerHandler.cmd_move))
 
 
 def break_handler(msg, event):
@@ -970,6 +999,8 @@ if __name__ == "__main__":
     #                 monster=data.monster, item=data.item, weapon=data.weapon, food=data.food,
     #                 alignment=data.alignment)
     #     rooms[data.number] = room
+    # connections are all served from one asyncio event loop thread, so
+    # room_players needs no lock
     # FIXME: determine how this works, it just copies 'set()' for each item in the list:
     room_players = {number: set() for number in game_map.rooms.keys()}
     logging.debug('init: %s' % room_players)
@@ -987,5 +1018,8 @@ if __name__ == "__main__":
     rations = Rations.read_rations("rations.json")
 
     host = "localhost"
+    # players, room_players etc. are per process, so more than one worker
+    # splits the game world; see net_server.start
+    workers = 1
     net_server.start(host, common.server_port, common.app_id, common.app_key,
-                     common.app_protocol, PlayerHandler)
+                     common.app_protocol, PlayerHandler, workers=workers)
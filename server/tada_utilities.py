@@ -144,7 +144,7 @@ def input_yes_no(prompt: str):
             return False
 
 
-def fileread(self, filename: str):
+async def fileread(self, filename: str):
     """
     display a file to a user in 40 or 80 columns with more_prompt paging
     also handles highlighting [text in brackets] via re and colorama
@@ -192,9 +192,9 @@ def fileread(self, filename: str):
                         and we'll validate temp here (instead of in promptRequest) because of the possible
                         null represented by just hitting Return/Enter.
                         """
-                        temp = UserHandler.prompt_request(self, lines=[],
-                                                          prompt='[Enter]: Continue, [Q]uit: ',
-                                                          choices={})
+                        temp = await UserHandler.prompt_request(self, lines=[],
+                                                                prompt='[Enter]: Continue, [Q]uit: ',
+                                                                choices={})
                         logging.debug("fileread: temp = %s" % repr(temp))
                         # returns dict('text': 'response')
                         choice = temp.get('text')
@@ -205,7 +205,7 @@ def fileread(self, filename: str):
             return Message(lines=[], error_line=f'File {fh} not found.')
 
 
-def game_help(self, params: list):
+async def game_help(self, params: list):
     from net_server import Message
     """
     :param self:
@@ -215,7 +215,7 @@ def game_help(self, params: list):
     # function name 'help' shadows built-in name
     logging.info(f'game_help: {params=}')
     # if len(params) == 0:
-    fileread(self, filename="main-menu")
+    await fileread(self, filename="main-menu")
     return Message(lines=["Done."])
 
 